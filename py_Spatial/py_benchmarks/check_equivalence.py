@@ -0,0 +1,613 @@
+"""
+# Name: Rapid Benefit Indicator Assessment - Equivalence Check
+# Purpose: Run the reference path and each fast path on the same synthetic
+#          inputs (see synthetic_inputs.py) and compare every output field,
+#          with per-field tolerances, reporting speedups and discrepancies
+#          together so fast paths can be turned on with confidence.
+#
+# Version Notes:
+# Developed in ArcGIS 10.3
+#0.1.0 full assessment paths and helper paths
+#0.1.1 overlapping sites, population sums each zone on its own
+#0.1.2 full paths counting a population raster as well as addresses
+#0.1.3 shared buffers check
+#0.1.4 incremental run after moving a site that overlaps another
+#0.1.5 cached run with only some sites cached
+#0.1.6 incremental runs keep sites and results next to the inputs
+#0.1.7 shared buffers of Social Equity with Flood Risk and Bird Watching
+#0.1.8 shared wetlands overlay and routes, with workers too
+#0.1.9 Scenic View with wetlands dissolved beforehand
+#0.1.10 assess with the open backend against arcpy
+#
+# Example: python check_equivalence.py --sites 50 --addresses 50000
+#          python check_equivalence.py --paths tiles cached --out eq.json
+"""
+###########IMPORTS###########
+import os
+import sys
+import json
+import argparse
+import tempfile
+from fnmatch import fnmatch
+from numbers import Number
+from collections import OrderedDict
+import arcpy
+
+import synthetic_inputs
+from run_benchmarks import load_tools
+
+arcpy.env.overwriteOutput = True #overwrite existing files
+
+###########DEFAULTS############
+# (field pattern, absolute, relative) tolerance, the first match is used.
+# Text (YES/NO) must match exactly whatever the tolerance.
+TOLERANCES = [("*_boo", 0, 0),
+              ("*_cnt", 0.5, 0),  # population sums from a raster
+              ("*_acr", 1e-4, 1e-6),
+              ("*", 1e-6, 1e-6)]
+# Helpers (see helper_paths) compare every value with this tolerance
+HELPER_TOLERANCES = [("*", 1e-6, 1e-6)]
+# The open backend approximates buffer curves (see open_buffer), which
+# changes areas by less than 1e-4, but no population cell may differ
+OPEN_TOLERANCES = [("buffer_population", 0.5, 0), ("*", 1e-6, 1e-4)]
+# Fraction of synthetic sites overlapping another site (see site_rows)
+OVERLAP = 0.5
+# Discrepancies listed for each path, all are kept in the JSON output
+SHOW = 20
+###############################
+###########FUNCTIONS###########
+message = synthetic_inputs.message
+
+
+def tolerance(field, tolerances=TOLERANCES):
+    """returns the (absolute, relative) tolerance for field"""
+    for pattern, abs_tol, rel_tol in tolerances:
+        if fnmatch(field, pattern):
+            return abs_tol, rel_tol
+    return 0, 0
+
+
+def equivalent(ref, fast, abs_tol, rel_tol):
+    """True if fast matches ref within the tolerances"""
+    if ref is None or fast is None:
+        return ref is None and fast is None
+    if isinstance(ref, Number) and isinstance(fast, Number):
+        return abs(float(fast) - float(ref)) <= max(abs_tol,
+                                                    rel_tol * abs(float(ref)))
+    return ref == fast
+
+
+def compare(ref, fast, tolerances=TOLERANCES):
+    """Compare Results
+    Purpose: Returns a list of discrepancies between ref and fast results
+             (dicts of values by field and site ID, see read_results).
+    """
+    found = []
+    for field in ref:
+        if field not in fast:
+            found.append({"field": field, "site": None,
+                          "problem": "missing field"})
+            continue
+        abs_tol, rel_tol = tolerance(field, tolerances)
+        for site, value in ref[field].items():
+            if site not in fast[field]:
+                found.append({"field": field, "site": site, "ref": value,
+                              "problem": "missing site"})
+            elif not equivalent(value, fast[field][site], abs_tol, rel_tol):
+                found.append({"field": field, "site": site, "ref": value,
+                              "fast": fast[field][site],
+                              "problem": "different"})
+    found += [{"field": field, "site": None, "problem": "extra field"}
+              for field in fast if field not in ref]
+    return found
+
+
+def read_results(tools, outTbl, sites):
+    """Returns result fields of outTbl as {field: {orig_ID: value}}"""
+    skip = [f.name for f in arcpy.ListFields(sites)]
+    skip += ["orig_ID", "site_hash", "run_hash"]
+    fields = [f.name for f in arcpy.ListFields(outTbl)
+              if f.name not in skip and f.type not in ["OID", "Geometry"]
+              and f.editable]
+    return dict((field, tools.field_to_dict(outTbl, ["orig_ID", field]))
+                for field in fields)
+
+
+def assessment_params(tools, inputs, outTbl, **options):
+    """Assessment Parameters
+    Purpose: Returns the Full Indicator Tool parameters for every benefit
+             on inputs, with options (e.g. workers=4) set by name.
+    """
+    params = tools.Full_Indicator_Tool().getParameterInfo()
+    i = inputs
+    values = {"in_poly": i["sites"], "in_pnts": i["addresses"],
+              "flood": True, "view": True, "edu": True, "rec": True,
+              "bird": True, "socEq": True, "rel": True,
+              "flood_zone": i["flood_zone"], "flood_sub": i["subs"],
+              "edu_inst": i["edu_inst"], "bus_stp": i["bus_stp"],
+              "trails": i["trails"], "roads": i["roads"],
+              "in_wet": i["wetlands"], "land_use": i["landuse"],
+              "LULCFld": i["landuse_field"],
+              "grn_field_val": i["greenspace"], "soc_vul_poly": i["sovi"],
+              "soc_field": i["sovi_field"], "soc_field_val": i["sovi_high"],
+              "cons_poly": i["conserved"],
+              "Conservation_Field": i["cons_field"],
+              "Conservation_Type": i["conserved_values"],
+              "outTable": outTbl}
+    values.update(options)
+    for param in params:
+        if param.name in values:
+            value = values[param.name]
+            if isinstance(value, list):
+                value = ";".join(value)  # multivalue
+            param.value = value
+    return params
+
+
+def run_path(tools, inputs, folder, name, options, warm=False):
+    """Run Path
+    Purpose: Returns the results of the full assessment run with options
+             and the seconds it took, in its own geodatabase in folder.
+    Notes: With warm it is run once before it is timed, so caches are
+           filled (see run_cached) and incremental runs reuse every site.
+           If warm is a function it is called with tools between the two
+           runs, e.g. to drop cached results (see drop_cached).
+    """
+    gdb = "eq_" + "".join(x if x.isalnum() else "_" for x in name) + ".gdb"
+    tools.del_exists(os.path.join(folder, gdb))
+    arcpy.CreateFileGDB_management(folder, gdb)
+    outTbl = os.path.join(folder, gdb, "results")
+    params = assessment_params(tools, inputs, outTbl, **options)
+    if warm:
+        tools.main(params)
+        if callable(warm):
+            warm(tools)
+    start = tools.timer()
+    tools.main(params)
+    seconds = tools.timer()[0] - start[0]
+    return read_results(tools, outTbl, inputs["sites"]), seconds
+
+
+def move_site(sites, dx=50.0):
+    """Moves the first site overlapping another dx meters east"""
+    geoms = list(arcpy.da.SearchCursor(sites, ["OID@", "SHAPE@"]))
+    for oid, shape in geoms:
+        if any(x != oid and not shape.disjoint(g) for x, g in geoms):
+            break
+    else:
+        raise ValueError("No overlapping sites to move, see --overlap")
+    OID = arcpy.Describe(sites).OIDFieldName
+    with arcpy.da.UpdateCursor(sites, ["SHAPE@XY"],
+                               '"{}" = {}'.format(OID, oid)) as cursor:
+        for row in cursor:
+            cursor.updateRow([(row[0][0] + dx, row[0][1])])
+    message("Moved site {} {} meters east".format(oid, dx))
+
+
+def drop_cached(tools):
+    """Deletes every other indicator cache record, so some sites are cached
+    and others, overlapping them, are not (see run_cached)"""
+    paths = sorted(os.path.join(folder, name) for folder, dirs, files
+                   in os.walk(tools.indicator_cache_dir) for name in files)
+    for path in paths[::2]:
+        os.remove(path)
+
+
+def full_paths():
+    """Full Assessment Paths
+    Purpose: Returns {name: (options, warm, cache)} of fast paths through
+             main to check against the reference (serial, no cache).
+    """
+    return OrderedDict([
+        ("parallel", ({"workers": 3}, False, False)),
+        ("tiles", ({"tiles": 4}, False, False)),
+        ("cached", ({}, True, True)),
+        ("cached (partial)", ({}, drop_cached, True)),
+        ("incremental", ({"incremental": True}, True, False))])
+
+
+def single_zones(tools, poly, popRast):
+    """Returns buffer_population of each poly feature on its own"""
+    dct = {}
+    OID = arcpy.Describe(poly).OIDFieldName
+    for (ID,) in arcpy.da.SearchCursor(poly, ["OID@"]):
+        arcpy.MakeFeatureLayer_management(poly, "eq_zone",
+                                          '"{}" = {}'.format(OID, ID))
+        dct.update(tools.buffer_population("eq_zone", popRast))
+        arcpy.Delete_management("eq_zone")
+    return dct
+
+
+def helper_paths(tools, inputs, outTbl, folder):
+    """Helper Paths
+    Purpose: Returns {name: (reference, fast, tolerances)} of functions
+             returning dicts by site ID from helpers the modules spend most
+             time in.
+    Notes: Fast helpers are checked here before they are used by modules.
+           Prepared inputs (see prep_input) are checked by giving helpers a
+           copy reduced to the reach they are used at. The open backend
+           (see use_backend) is checked against arcpy on the same inputs,
+           with the population raster copied to a GeoTIFF it can read.
+           Buffers of nearby sites overlap, and each buffer's population
+           is checked against summing that buffer alone.
+    """
+    buf = tools.simple_buffer(outTbl, "eq_buffer", "1 Miles")
+    ws = os.path.join(folder, "eq_helpers.gdb")
+
+    def prepared(dataset):
+        return tools.copy_near(outTbl, dataset, "1 Miles", ws)
+
+    def open_backend(func):
+        def run():
+            tools.use_backend("open")
+            try:
+                return func()
+            finally:
+                tools.use_backend("arcpy")
+        return run
+
+    def open_buf():
+        return tools.simple_buffer(outTbl, "eq_buffer", "1 Miles")
+
+    def donut():
+        return tools.list_areas(tools.buffer_donut(outTbl, "eq_donut",
+                                                   "1 Miles"))
+
+    tif = os.path.join(folder, "eq_population.tif")
+    tools.del_exists(tif)
+    arcpy.CopyRaster_management(inputs["popRast"], tif)
+
+    i = inputs
+    paths = OrderedDict()
+    paths["buffer_contains (prepared)"] = (
+        lambda: tools.buffer_contains(buf, i["addresses"]),
+        lambda: tools.buffer_contains(buf, prepared(i["addresses"])),
+        HELPER_TOLERANCES)
+    paths["percent_cover (prepared)"] = (
+        lambda: tools.percent_cover(i["landuse"], buf),
+        lambda: tools.percent_cover(prepared(i["landuse"]), buf),
+        HELPER_TOLERANCES)
+    paths["buffer_population (overlap)"] = (
+        lambda: single_zones(tools, buf, i["popRast"]),
+        lambda: tools.buffer_population(buf, i["popRast"]),
+        HELPER_TOLERANCES)
+    paths["buffer_population (prepared)"] = (
+        lambda: tools.buffer_population(buf, i["popRast"]),
+        lambda: tools.buffer_population(buf, tools.prep_input(
+            outTbl, i["popRast"], "1 Miles", ws)),
+        HELPER_TOLERANCES)
+    paths["list_areas (open)"] = (
+        lambda: tools.list_areas(outTbl, "ACRES"),
+        open_backend(lambda: tools.list_areas(outTbl, "ACRES")),
+        HELPER_TOLERANCES)
+    paths["simple_buffer (open)"] = (
+        lambda: tools.list_areas(buf),
+        open_backend(lambda: tools.list_areas(open_buf())), OPEN_TOLERANCES)
+    paths["buffer_donut (open)"] = (donut, open_backend(donut),
+                                    OPEN_TOLERANCES)
+    paths["buffer_contains (open)"] = (
+        lambda: tools.buffer_contains(buf, i["addresses"]),
+        open_backend(lambda: tools.buffer_contains(open_buf(),
+                                                   i["addresses"])),
+        OPEN_TOLERANCES)
+    paths["percent_cover (open)"] = (
+        lambda: tools.percent_cover(i["landuse"], buf),
+        open_backend(lambda: tools.percent_cover(i["landuse"], open_buf())),
+        OPEN_TOLERANCES)
+    paths["buffer_population (open)"] = (
+        lambda: tools.buffer_population(buf, i["popRast"]),
+        open_backend(lambda: tools.buffer_population(open_buf(), tif)),
+        OPEN_TOLERANCES)
+    return paths
+
+
+def check_helpers(tools, inputs, folder, names=None):
+    """Returns a report (see report) for each helper path in names"""
+    ws = os.path.join(folder, "eq_helpers.gdb")
+    tools.del_exists(ws)
+    arcpy.CreateFileGDB_management(folder, "eq_helpers.gdb")
+    outTbl = os.path.join(ws, "sites")
+    tools.create_outTbl(inputs["sites"], outTbl)
+    reports = []
+    for name, (ref, fast, tolerances) in helper_paths(
+            tools, inputs, outTbl, folder).items():
+        if names and name.split(" ")[0] not in names and name not in names:
+            continue
+        start = tools.timer()
+        ref_out = ref()
+        ref_s = tools.timer()[0] - start[0]
+        start = tools.timer()
+        fast_out = fast()
+        fast_s = tools.timer()[0] - start[0]
+        field = name.split(" ")[0]
+        reports.append(report(name, ref_s, fast_s, compare(
+            {field: ref_out}, {field: fast_out}, tolerances)))
+    return reports
+
+
+def report(name, ref_s, fast_s, found):
+    """Returns and messages the speedup and discrepancies of a path"""
+    speedup = ref_s / fast_s if fast_s > 0 else None
+    message("{}: {:.2f} s vs {:.2f} s reference, {} speedup, {} "
+            "discrepancies".format(name, fast_s, ref_s,
+                                   "{:.2f}x".format(speedup)
+                                   if speedup else "n/a", len(found)))
+    for x in found[:SHOW]:
+        message("  {field} site {site}: {problem} {0} {1}".format(
+            x.get("ref", ""), x.get("fast", ""), **x), 1)
+    return {"path": name, "seconds": fast_s, "reference_seconds": ref_s,
+            "speedup": speedup, "discrepancies": found}
+
+
+def check_full(tools, inputs, folder, names=None):
+    """Check Full Assessment
+    Purpose: Returns a report (see report) for each full assessment path,
+             run counting addresses and again counting the population
+             raster.
+    Notes: Population counts are where overlapping sites could change each
+           other's results, e.g. when they are in different tiles.
+    """
+    cache_dir, cache_size = tools.indicator_cache_dir, \
+        tools.indicator_cache_size
+    tools.indicator_cache_dir = os.path.join(folder, "eq_cache")
+    reports = []
+    try:
+        for assets, extra in [("", {}),
+                              (" (population)", {"in_pnts": None,
+                                                 "popRast":
+                                                 inputs["popRast"]})]:
+            tools.indicator_cache_size = 0  # reference never uses the cache
+            ref, ref_s = run_path(tools, inputs, folder, "reference" + assets,
+                                  extra)
+            for name, (options, warm, cache) in full_paths().items():
+                if names and name.split(" ")[0] not in names and \
+                        name not in names:
+                    continue
+                tools.indicator_cache_size = cache_size if cache else 0
+                fast, fast_s = run_path(tools, inputs, folder, name + assets,
+                                        dict(options, **extra), warm)
+                reports.append(report(name + assets, ref_s, fast_s,
+                                      compare(ref, fast)))
+    finally:
+        tools.indicator_cache_dir = cache_dir
+        tools.indicator_cache_size = cache_size
+    return reports
+
+
+def check_moved(tools, inputs, folder):
+    """Check Moved Neighbour
+    Purpose: Returns a report (see report) comparing an incremental run,
+             after moving a site that overlaps another, to a full run of
+             the moved sites, both counting the population raster.
+    Notes: Sites the moved site overlaps are unchanged so their results
+           are reused, they must not depend on where their neighbours are.
+           Sites and results are kept in the inputs' geodatabase, as in
+           most projects, so saving results or editing a site must not
+           change the inputs' fingerprints: only the moved site may be
+           assessed again (see incremental_stats).
+    """
+    gdb = inputs["gdb"]
+    moved = dict(inputs, sites=os.path.join(gdb, "eq_moved_sites"))
+    tools.del_exists(moved["sites"])
+    arcpy.CopyFeatures_management(inputs["sites"], moved["sites"])
+    outTbl = os.path.join(gdb, "eq_moved_results")
+    tools.del_exists(outTbl)
+    extra = {"in_pnts": None, "popRast": inputs["popRast"]}
+    params = assessment_params(tools, moved, outTbl, incremental=True,
+                               **extra)
+    cache_size = tools.indicator_cache_size
+    tools.indicator_cache_size = 0  # only incremental reuse is checked
+    try:
+        tools.main(params)
+        move_site(moved["sites"])
+        start = tools.timer()
+        tools.main(params)
+        fast_s = tools.timer()[0] - start[0]
+        changed = tools.incremental_stats["changed"]
+        fast = read_results(tools, outTbl, moved["sites"])
+        ref, ref_s = run_path(tools, moved, folder, "reference moved", extra)
+    finally:
+        tools.indicator_cache_size = cache_size
+    found = compare(ref, fast)
+    if changed != 1:
+        found.append({"field": "sites assessed again", "site": None,
+                      "ref": 1, "fast": changed, "problem": "different"})
+    return [report("incremental (moved)", ref_s, fast_s, found)]
+
+
+def shared_runs(wetlands_dissolved):
+    """Shared Buffer Runs
+    Purpose: Returns {name: (modules, options)} of benefits run together
+             that share intermediates (see shared_distances), with assess
+             keywords changed from the defaults in options.
+    Notes: Without landuse Recreation overlays wetlands, as Environmental
+           Education does (see share_covers). With workers the shared
+           intermediates are read by worker processes. Scenic View is also
+           given wetlands_dissolved, wetlands dissolved once (as
+           Assessment_Service does), to check it against dissolving them.
+    """
+    no_landuse = {"landuse": None, "landuse_field": None, "greenspace": None}
+    return OrderedDict([
+        ("edu+rec", (["edu", "rec"], {})),
+        ("edu+rec wetlands", (["edu", "rec"], no_landuse)),
+        ("flood+socEq", (["flood", "socEq"], {})),
+        ("bird+socEq", (["bird", "socEq"], {})),
+        ("view+bird", (["view", "bird"], {})),
+        ("edu+rec+view+bird workers", (["edu", "rec", "view", "bird"],
+                                       dict(no_landuse, workers=2))),
+        ("view dissolved", (["view"],
+                            {"wetlands_dissolved": wetlands_dissolved}))])
+
+
+def shared_distances(tools, modules):
+    """Shared Distances
+    Purpose: Returns the buffer distances more than one of modules uses,
+             from module_buffers and the Social Equity default distance
+             (see SocEqu_BuffDist), which should each be made only once.
+    """
+    names = ["FR_MODULE", "View_MODULE", "Edu_MODULE", "Rec_MODULE",
+             "Bird_MODULE"]
+    uses = [tools.module_buffers[name] for name, benefit
+            in zip(names, tools.benefits) if benefit in modules]
+    if "socEq" in modules:
+        ck = [benefit in modules for benefit in tools.benefits[:5]]
+        uses.append([tools.SocEqu_BuffDist(ck)])
+    return sorted(set(dist for use in uses for dist in use
+                      if sum(dist in x for x in uses) > 1))
+
+
+def check_shared(tools, inputs, folder):
+    """Check Shared Buffers
+    Purpose: Returns a report (see report) for each of shared_runs, on
+             whether a run of the modules makes each buffer they share only
+             once, and gives the results each module gives run alone (e.g.
+             a module deleting a shared buffer would leave the others
+             without it).
+    """
+    made = []
+    buffer_analysis = arcpy.Buffer_analysis
+
+    def counted(in_features, out_features, distance, *args, **kwargs):
+        made.append(str(distance))
+        return buffer_analysis(in_features, out_features, distance, *args,
+                               **kwargs)
+
+    i = inputs
+    keywords = dict(addresses=i["addresses"], flood_zone=i["flood_zone"],
+                    subs=i["subs"], edu_inst=i["edu_inst"],
+                    bus_stp=i["bus_stp"], trails=i["trails"],
+                    roads=i["roads"], wetlands=i["wetlands"],
+                    landuse=i["landuse"], landuse_field=i["landuse_field"],
+                    greenspace=i["greenspace"], sovi=i["sovi"],
+                    sovi_field=i["sovi_field"], sovi_high=i["sovi_high"])
+    ws = os.path.join(folder, "eq_shared.gdb")
+    tools.del_exists(ws)
+    arcpy.CreateFileGDB_management(folder, "eq_shared.gdb")
+    dissolved = os.path.join(ws, "wetlands_dissolved")
+    arcpy.Dissolve_management(i["wetlands"], dissolved, "", "",
+                              "SINGLE_PART")
+
+    def run(name, modules, options):
+        outTbl = os.path.join(ws, "".join(x if x.isalnum() else "_"
+                                          for x in name))
+        start = tools.timer()
+        tools.assess(i["sites"], modules=modules, outTbl=outTbl,
+                     output=None, **dict(keywords, **options))
+        seconds = tools.timer()[0] - start[0]
+        return read_results(tools, outTbl, i["sites"]), seconds
+
+    reports = []
+    cache_size = tools.indicator_cache_size
+    tools.indicator_cache_size = 0  # every site is assessed
+    try:
+        for name, (modules, options) in shared_runs(dissolved).items():
+            ref, ref_s = {}, 0
+            alone = dict((k, v) for k, v in options.items() if k in keywords)
+            for module in modules:
+                results, seconds = run(name + " " + module, [module], alone)
+                ref.update(results)
+                ref_s += seconds
+            del made[:]
+            arcpy.Buffer_analysis = counted  # the toolbox calls arcpy's
+            try:
+                fast, fast_s = run(name, modules, options)
+            finally:
+                arcpy.Buffer_analysis = buffer_analysis
+            found = compare(ref, fast)
+            for dist in shared_distances(tools, modules):
+                if made.count(dist) != 1:
+                    found.append({"field": dist + " buffers", "site": None,
+                                  "ref": 1, "fast": made.count(dist),
+                                  "problem": "different"})
+            reports.append(report("shared buffers " + name, ref_s, fast_s,
+                                  found))
+    finally:
+        tools.indicator_cache_size = cache_size
+    return reports
+
+
+def check_open(tools, inputs, folder):
+    """Check Open Backend
+    Purpose: Returns a report (see report) comparing assess run with the
+             open backend (see use_backend) to arcpy on the same inputs,
+             for every benefit the open backend assesses.
+    Notes: fiona reads the inputs from their geodatabase. Addresses are
+           counted rather than the population raster.
+    """
+    i = inputs
+    modules = ["view", "edu", "rec", "bird", "socEq", "rel"]
+    keywords = dict(addresses=i["addresses"], edu_inst=i["edu_inst"],
+                    bus_stp=i["bus_stp"], trails=i["trails"],
+                    roads=i["roads"], wetlands=i["wetlands"],
+                    landuse=i["landuse"], landuse_field=i["landuse_field"],
+                    greenspace=i["greenspace"], sovi=i["sovi"],
+                    sovi_field=i["sovi_field"], sovi_high=i["sovi_high"],
+                    conserved=i["conserved"], cons_field=i["cons_field"],
+                    conserved_values=i["conserved_values"])
+    ws = os.path.join(folder, "eq_open.gdb")
+    tools.del_exists(ws)
+    arcpy.CreateFileGDB_management(folder, "eq_open.gdb")
+    outTbl = os.path.join(ws, "results")
+    start = tools.timer()
+    tools.assess(i["sites"], modules=modules, outTbl=outTbl, output=None,
+                 **keywords)
+    ref_s = tools.timer()[0] - start[0]
+    ref = read_results(tools, outTbl, i["sites"])
+    tools.use_backend("open")
+    try:
+        start = tools.timer()
+        results = tools.assess(i["sites"], modules=modules, **keywords)
+        fast_s = tools.timer()[0] - start[0]
+    finally:
+        tools.use_backend("arcpy")
+    fast = dict((field, dict(zip(results["orig_ID"], values)))
+                for field, values in results.items() if field in ref)
+    return [report("assess (open)", ref_s, fast_s,
+                   compare(ref, fast, OPEN_TOLERANCES))]
+
+
+##############################
+###########EXECUTE############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--sites", type=int, default=20)
+    parser.add_argument("--addresses", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--overlap", type=float, default=OVERLAP,
+                        help="fraction of sites overlapping another site")
+    parser.add_argument("--folder", default=os.path.join(
+        tempfile.gettempdir(), "RBI_benchmarks"),
+        help="where inputs are generated and kept between runs")
+    parser.add_argument("--paths", nargs="+",
+                        help="paths to check, e.g. tiles percent_cover")
+    parser.add_argument("--skip-helpers", action="store_true")
+    parser.add_argument("--skip-full", action="store_true")
+    parser.add_argument("--out", help="report JSON file")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        os.makedirs(args.folder)
+    tools = load_tools()
+    inputs = synthetic_inputs.generate(args.folder, args.sites,
+                                       args.addresses, args.seed,
+                                       args.overlap)
+    # The Flood Risk module finds the synthetic NHD Plus in the same gdb
+    tools.nhd_gdb = inputs["gdb"]
+    reports = []
+    if not args.skip_helpers:
+        reports += check_helpers(tools, inputs, args.folder, args.paths)
+    if not args.skip_full:
+        reports += check_full(tools, inputs, args.folder, args.paths)
+        if not args.paths or "shared" in args.paths:
+            reports += check_shared(tools, inputs, args.folder)
+        if not args.paths or "incremental" in args.paths:
+            reports += check_moved(tools, inputs, args.folder)
+        if not args.paths or "open" in args.paths:
+            reports += check_open(tools, inputs, args.folder)
+    if args.out is not None:
+        with open(args.out, "w") as f:
+            json.dump({"scale": inputs["scale"], "paths": reports}, f,
+                      indent=1, default=str)
+        message("Equivalence report written to " + args.out)
+    if any(len(x["discrepancies"]) > 0 for x in reports):
+        sys.exit(1)
@@ -0,0 +1,241 @@
+"""
+# Name: Rapid Benefit Indicator Assessment - Benchmarks
+# Purpose: Time each benefit module and the helpers they spend most time
+#          in on synthetic inputs (see synthetic_inputs.py), writing JSON
+#          results that can be compared between versions.
+#
+# Version Notes:
+# Developed in ArcGIS 10.3
+#0.1.0 modules, helpers and comparison to earlier results
+#0.1.1 population counts of overlapping buffers
+#
+# Example: python run_benchmarks.py --scale small medium
+#          python run_benchmarks.py --sites 500 --addresses 2000000
+#          python run_benchmarks.py --scale small --compare before.json
+"""
+###########IMPORTS###########
+import os
+import sys
+import imp
+import json
+import time
+import argparse
+import platform
+import tempfile
+import arcpy
+
+import synthetic_inputs
+
+arcpy.env.overwriteOutput = True #overwrite existing files
+
+###########DEFAULTS############
+# Toolbox the modules are timed from
+PYT = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(
+    __file__))), "RBI_Spatial_Analysis_Tools.pyt")
+# Scales, (sites, addresses)
+SCALES = {"small": (10, 10000), "medium": (100, 100000),
+          "large": (1000, 1000000), "huge": (10000, 10000000)}
+# Slower by more than this ratio is a regression, see compare
+THRESHOLD = 1.2
+###############################
+###########FUNCTIONS###########
+message = synthetic_inputs.message
+
+
+def load_tools(pyt=PYT):
+    """Returns the toolbox loaded as a module"""
+    return imp.load_source("RBI_Spatial_Analysis_Tools", pyt)
+
+
+def timed(tools, results, name, func, *args):
+    """Timed Call
+    Purpose: Returns func(*args), adding its wall and CPU seconds, peak
+             memory and result size to results as name.
+    Notes: Errors are recorded and messaged so one failure doesn't stop
+           the rest of the benchmark, None is returned.
+    """
+    record = {"name": name}
+    start = tools.timer()
+    try:
+        out = func(*args)
+    except Exception as e:
+        message("{} failed: {}".format(name, e), 1)
+        record["error"] = str(e)
+        out = None
+    end = tools.timer()
+    record.update({"wall": end[0] - start[0], "cpu": end[1] - start[1],
+                   "peak": tools.process_memory(True)})
+    if isinstance(out, (dict, list)):
+        record["rows"] = len(out)
+    results.append(record)
+    message("{:>10.3f} s  {}".format(record["wall"], name))
+    return out
+
+
+def bench_helpers(tools, inputs, outTbl, results):
+    """Times the helpers benefit modules spend most of their time in"""
+    buf = timed(tools, results, "simple_buffer", tools.simple_buffer,
+                outTbl, "bench_buffer", "1 Miles")
+    if buf is None:
+        return
+    timed(tools, results, "list_areas", tools.list_areas, buf)
+    timed(tools, results, "buffer_contains", tools.buffer_contains, buf,
+          inputs["addresses"])
+    timed(tools, results, "buffer_population", tools.buffer_population, buf,
+          inputs["popRast"])
+    timed(tools, results, "percent_cover", tools.percent_cover,
+          inputs["landuse"], buf)
+    # Buffers as wide as the largest population distance overlap their
+    # neighbours, the case buffer_population splits into faces
+    wide = timed(tools, results, "simple_buffer (6 Miles)",
+                 tools.simple_buffer, outTbl, "bench_wide", "6 Miles")
+    if wide is not None:
+        timed(tools, results, "buffer_population (overlapping)",
+              tools.buffer_population, wide, inputs["popRast"])
+        tools.deleteFC_Lst([wide])
+    donut = timed(tools, results, "buffer_donut", tools.buffer_donut,
+                  outTbl, "bench_donut", "1 Miles")
+    tools.deleteFC_Lst([buf, donut])
+    COMs = timed(tools, results, "setNHD_dict", tools.setNHD_dict,
+                 inputs["flow"])
+    if COMs is None:
+        return
+    DownCOMs = COMs[1]
+    # Every catchment downstream of every catchment, as FR_MODULE does for
+    # catchments sites are in
+    timed(tools, results, "children", lambda: [
+        tools.children(x, DownCOMs) for x in list(DownCOMs.keys())])
+
+
+def bench_modules(tools, inputs, outTbl, folder, results):
+    """Times each benefit module on outTbl, then Report_MODULE on their
+    results"""
+    i = inputs
+    modules = [
+        ("FR_MODULE", [i["addresses"], None, i["flood_zone"], i["wetlands"],
+                       i["subs"], i["catchment"], i["catchment_field"],
+                       i["flow"]]),
+        ("View_MODULE", [i["addresses"], None, i["trails"], i["roads"],
+                         i["wetlands"], i["landuse"], i["landuse_field"],
+                         i["greenspace"], None]),
+        ("Edu_MODULE", [i["edu_inst"], i["wetlands"]]),
+        ("Rec_MODULE", [i["addresses"], None, i["trails"], i["bus_stp"],
+                        i["wetlands"], i["landuse"], i["landuse_field"],
+                        i["greenspace"]]),
+        ("Bird_MODULE", [i["addresses"], None, i["trails"], i["roads"]]),
+        ("socEq_MODULE", [i["sovi"], i["sovi_field"], i["sovi_high"],
+                          "2.5 Miles"]),
+        ("reliability_MODULE", [i["conserved"], i["cons_field"],
+                                i["conserved_values"],
+                                i["threatened_values"], "500 Feet"])]
+    for module, PARAMS in modules:
+        timed(tools, results, module, getattr(tools, module),
+              PARAMS + [outTbl])
+    # Flood Risk with population from the raster instead of addresses
+    pop_PARAMS = [None, i["popRast"]] + modules[0][1][2:] + [outTbl]
+    timed(tools, results, "FR_MODULE (population raster)", tools.FR_MODULE,
+          pop_PARAMS)
+
+    mxd = os.path.join(os.path.dirname(PYT), "report_layout.mxd")
+    if arcpy.Exists(mxd):
+        pdf = os.path.join(folder, "benchmark_report.pdf")
+        timed(tools, results, "Report_MODULE", tools.Report_MODULE,
+              [outTbl, "siteName", mxd, pdf])
+    else:
+        message("Report layout not found, Report_MODULE not timed", 1)
+
+
+def run(sites, addresses, folder, seed=0, helpers=True, modules=True):
+    """Run Benchmark
+    Purpose: Returns benchmark results for one scale as a dict, with the
+             machine and scale they were timed at.
+    """
+    tools = load_tools()
+    results = []
+    inputs = synthetic_inputs.generate(folder, sites, addresses, seed)
+    name = "bench_{}_{}.gdb".format(sites, addresses)
+    ws = os.path.join(folder, name)
+    tools.del_exists(ws)
+    arcpy.CreateFileGDB_management(folder, name)
+    outTbl = os.path.join(ws, "results")
+    timed(tools, results, "create_outTbl", tools.create_outTbl,
+          inputs["sites"], outTbl)
+    if helpers:
+        bench_helpers(tools, inputs, outTbl, results)
+    if modules:
+        bench_modules(tools, inputs, outTbl, folder, results)
+    return {"scale": inputs["scale"], "results": results,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": {"node": platform.node(),
+                        "processor": platform.processor(),
+                        "python": platform.python_version(),
+                        "arcgis": arcpy.GetInstallInfo()["Version"]}}
+
+
+def compare(runs, baseline, threshold=THRESHOLD):
+    """Compare Benchmarks
+    Purpose: Messages wall time of runs against baseline runs at the same
+             scale, returning the number slower by more than threshold.
+    """
+    regressions = 0
+    for run_ in runs:
+        key = (run_["scale"]["sites"], run_["scale"]["addresses"])
+        before = [x for x in baseline
+                  if (x["scale"]["sites"], x["scale"]["addresses"]) == key]
+        if len(before) == 0:
+            message("No baseline for {} sites, {} addresses".format(*key))
+            continue
+        old = dict((x["name"], x) for x in before[0]["results"])
+        message("Compared to baseline, {} sites, {} addresses:".format(*key))
+        for record in run_["results"]:
+            if record["name"] not in old or "error" in record:
+                continue
+            ratio = record["wall"] / max(old[record["name"]]["wall"], 1e-6)
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            message("{:>8.2f}x  {:>10.3f} s  {}{}".format(
+                ratio, record["wall"], record["name"], flag))
+    return regressions
+
+
+##############################
+###########EXECUTE############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--scale", nargs="+", choices=sorted(SCALES),
+                        default=[], help="preset scales to run")
+    parser.add_argument("--sites", type=int, help="sites to generate")
+    parser.add_argument("--addresses", type=int, default=100000,
+                        help="address points to generate with --sites")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--folder", default=os.path.join(
+        tempfile.gettempdir(), "RBI_benchmarks"),
+        help="where inputs are generated and kept between runs")
+    parser.add_argument("--out", help="results JSON file")
+    parser.add_argument("--compare", help="earlier results JSON file")
+    parser.add_argument("--skip-helpers", action="store_true")
+    parser.add_argument("--skip-modules", action="store_true")
+    args = parser.parse_args()
+
+    scales = [SCALES[x] for x in args.scale]
+    if args.sites is not None:
+        scales.append((args.sites, args.addresses))
+    if len(scales) == 0:
+        scales = [SCALES["small"]]
+    if not os.path.isdir(args.folder):
+        os.makedirs(args.folder)
+
+    runs = [run(sites, addresses, args.folder, args.seed,
+                not args.skip_helpers, not args.skip_modules)
+            for sites, addresses in scales]
+    out = args.out or os.path.join(args.folder, "benchmark_{}.json".format(
+        time.strftime("%Y%m%d_%H%M%S")))
+    with open(out, "w") as f:
+        json.dump(runs, f, indent=1)
+    message("Benchmark results written to " + out)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            if compare(runs, json.load(f)) > 0:
+                sys.exit(1)
@@ -0,0 +1,305 @@
+"""
+# Name: Rapid Benefit Indicator Assessment - Synthetic Inputs
+# Purpose: Generate synthetic inputs for benchmarking every module at
+#          any scale, since the example inputs are not shipped.
+#
+# Version Notes:
+# Developed in ArcGIS 10.3
+#0.1.0 synthetic sites, addresses, polygons, population raster and NHDPlus
+#0.1.1 overlapping sites
+"""
+###########IMPORTS###########
+import os
+import math
+import json
+import arcpy
+import numpy
+
+arcpy.env.overwriteOutput = True #overwrite existing files
+
+###########DEFAULTS############
+# NAD 1983 UTM Zone 19N, meters
+SR = arcpy.SpatialReference(26919)
+# Lower left corner of the area inputs are generated in
+ORIGIN = (280000.0, 4580000.0)
+# Area per site, sets how spread out sites are
+SITE_SPACING = 2000.0  # meters
+# Field values used for landuse, social vulnerability and conservation
+LANDUSE = ["Forest", "Park", "Open Space", "Residential", "Commercial",
+           "Agriculture", "Water"]
+GREENSPACE = ["Forest", "Park", "Open Space"]
+SOVI = ["High", "Medium", "Low"]
+SOVI_HIGH = ["High"]
+CONSERVATION = ["Conserved", "Protected", "Developable", "Developed"]
+CONSERVED = ["Conserved", "Protected"]
+###############################
+###########FUNCTIONS###########
+def message(string, severity = 0):
+    """Generic message
+    Purpose: prints string message in py or pyt.
+    """
+    print(string)
+    if severity == 1:
+        arcpy.AddWarning(string)
+    else:
+        arcpy.AddMessage(string)
+
+
+def extent_side(sites):
+    """returns the side in meters of the square area for sites"""
+    return max(10000.0, math.sqrt(sites) * SITE_SPACING)
+
+
+def blob(rand, x, y, radius, vertices=24):
+    """Blob Polygon
+    Purpose: returns an arcpy.Polygon roughly a circle of radius around
+             x, y, with jittered vertices so shapes are not all alike.
+    """
+    pnts = []
+    for i in range(vertices):
+        a = 2 * math.pi * i / vertices
+        r = radius * rand.uniform(0.7, 1.3)
+        pnts.append(arcpy.Point(x + r * math.cos(a), y + r * math.sin(a)))
+    pnts.append(pnts[0])
+    return arcpy.Polygon(arcpy.Array(pnts), SR)
+
+
+def square(x, y, side):
+    """returns an arcpy.Polygon square of side with lower left at x, y"""
+    pnts = [arcpy.Point(x, y), arcpy.Point(x, y + side),
+            arcpy.Point(x + side, y + side), arcpy.Point(x + side, y),
+            arcpy.Point(x, y)]
+    return arcpy.Polygon(arcpy.Array(pnts), SR)
+
+
+def site_rows(rand, sites, side, overlap=0.0):
+    """Site Rows
+    Purpose: returns (blob, siteName) rows of sites scattered over the
+             area, where about an overlap fraction of them are placed on
+             the site before so they overlap, as for phases of one
+             restoration.
+    """
+    rows = []
+    x = y = None
+    for i in range(sites):
+        x2 = ORIGIN[0] + rand.uniform(0, side)
+        y2 = ORIGIN[1] + rand.uniform(0, side)
+        if overlap > 0 and i > 0 and rand.uniform() < overlap:
+            a = rand.uniform(0, 2 * math.pi)
+            x2, y2 = x + 100 * math.cos(a), y + 100 * math.sin(a)
+        x, y = x2, y2
+        rows.append((blob(rand, x, y, rand.uniform(50, 150)),
+                     "Site {}".format(i + 1)))
+    return rows
+
+
+def new_fc(gdb, name, geometry, fields=()):
+    """Creates feature class name in gdb with (field, type) fields"""
+    fc = os.path.join(gdb, name)
+    arcpy.CreateFeatureclass_management(gdb, name, geometry,
+                                        spatial_reference=SR)
+    for field, typ in fields:
+        arcpy.AddField_management(fc, field, typ)
+    return fc
+
+
+def insert_rows(fc, fields, rows):
+    """Inserts rows of values for fields (e.g. ["SHAPE@", "LULC"])"""
+    with arcpy.da.InsertCursor(fc, fields) as cursor:
+        for row in rows:
+            cursor.insertRow(row)
+
+
+def points_array(rand, n, centers, side):
+    """Points Array
+    Purpose: returns n points as a structured numpy array of x, y,
+             clustered around centers like addresses around towns.
+    """
+    arr = numpy.zeros(n, dtype=[("x", "f8"), ("y", "f8")])
+    pick = rand.randint(0, len(centers), n)
+    spread = rand.uniform(200, side / 20.0, len(centers))[pick]
+    arr["x"] = centers[pick, 0] + rand.normal(0, 1, n) * spread
+    arr["y"] = centers[pick, 1] + rand.normal(0, 1, n) * spread
+    # Keep points in the area
+    arr["x"] = numpy.clip(arr["x"], ORIGIN[0], ORIGIN[0] + side)
+    arr["y"] = numpy.clip(arr["y"], ORIGIN[1], ORIGIN[1] + side)
+    return arr
+
+
+def points_fc(gdb, name, arr):
+    """Writes points array (see points_array) to feature class name"""
+    fc = os.path.join(gdb, name)
+    arcpy.da.NumPyArrayToFeatureClass(arr, fc, ["x", "y"], SR)
+    return fc
+
+
+def grid_polygons(gdb, name, rand, side, cell, field, values):
+    """Grid Polygons
+    Purpose: Covers the area with square polygons of cell size, each
+             given a random value from values in field.
+    """
+    fc = new_fc(gdb, name, "POLYGON", [(field, "TEXT")])
+    n = int(math.ceil(side / cell))
+    rows = []
+    for i in range(n):
+        for j in range(n):
+            rows.append((square(ORIGIN[0] + i * cell, ORIGIN[1] + j * cell,
+                                cell), values[rand.randint(len(values))]))
+    insert_rows(fc, ["SHAPE@", field], rows)
+    return fc
+
+
+def blob_polygons(gdb, name, rand, side, count, radius):
+    """Creates count blobs (see blob) scattered over the area"""
+    fc = new_fc(gdb, name, "POLYGON")
+    rows = [(blob(rand, ORIGIN[0] + rand.uniform(0, side),
+                  ORIGIN[1] + rand.uniform(0, side),
+                  radius * rand.uniform(0.5, 1.5)),)
+            for i in range(count)]
+    insert_rows(fc, ["SHAPE@"], rows)
+    return fc
+
+
+def lines(gdb, name, rand, side, count, vertices=10):
+    """Creates count random walk lines like roads or trails"""
+    fc = new_fc(gdb, name, "POLYLINE")
+    rows = []
+    step = side / vertices
+    for i in range(count):
+        x = ORIGIN[0] + rand.uniform(0, side)
+        y = ORIGIN[1] + rand.uniform(0, side)
+        a = rand.uniform(0, 2 * math.pi)
+        pnts = []
+        for v in range(vertices):
+            pnts.append(arcpy.Point(x, y))
+            a += rand.normal(0, 0.4)
+            x += step * math.cos(a)
+            y += step * math.sin(a)
+        rows.append((arcpy.Polyline(arcpy.Array(pnts), SR),))
+    insert_rows(fc, ["SHAPE@"], rows)
+    return fc
+
+
+def population_raster(gdb, name, addresses, side, cell=100.0):
+    """Population Raster
+    Purpose: Writes a raster of people per cell, from the count of
+             addresses in each cell (2.5 people each).
+    """
+    n = int(math.ceil(side / cell))
+    counts, x_edges, y_edges = numpy.histogram2d(
+        addresses["y"], addresses["x"], bins=n,
+        range=[[ORIGIN[1], ORIGIN[1] + n * cell],
+               [ORIGIN[0], ORIGIN[0] + n * cell]])
+    # Rows run north to south in a raster
+    people = numpy.flipud(counts * 2.5).astype("float32")
+    raster = arcpy.NumPyArrayToRaster(people, arcpy.Point(*ORIGIN), cell,
+                                      cell)
+    out = os.path.join(gdb, name)
+    raster.save(out)
+    arcpy.DefineProjection_management(out, SR)
+    return out
+
+
+def nhdplus(gdb, rand, side, cell=1000.0):
+    """Synthetic NHDPlus
+    Purpose: Writes a Catchment grid with FEATUREID and a PlusFlow table
+             of FROMCOMID to TOCOMID, like the NHDPlus downloads.
+    Notes: Each catchment drains to the next one east, or south where a
+           random stream turns, and the south east corner drains out (0).
+           So every catchment has a long path downstream, as along a coast.
+    """
+    n = int(math.ceil(side / cell))
+
+    def com(i, j):
+        return 1000000 + i * n + j  # COMID of catchment column i, row j
+
+    cat = new_fc(gdb, "Catchment", "POLYGON", [("FEATUREID", "LONG")])
+    insert_rows(cat, ["SHAPE@", "FEATUREID"],
+                [(square(ORIGIN[0] + i * cell, ORIGIN[1] + j * cell, cell),
+                  com(i, j)) for i in range(n) for j in range(n)])
+    flow = numpy.zeros(n * n, dtype=[("FROMCOMID", "i4"), ("TOCOMID", "i4")])
+    k = 0
+    for i in range(n):
+        for j in range(n):
+            if i == n - 1 and j == 0:
+                to = 0  # outlet
+            elif i == n - 1 or (j > 0 and rand.uniform() < 0.3):
+                to = com(i, j - 1)  # south
+            else:
+                to = com(i + 1, j)  # east
+            flow[k] = (com(i, j), to)
+            k += 1
+    table = os.path.join(gdb, "PlusFlow")
+    arcpy.da.NumPyArrayToTable(flow, table)
+    return cat, table
+
+
+def generate(folder, sites=100, addresses=100000, seed=0, overlap=0.0):
+    """Generate Synthetic Inputs
+    Purpose: Returns a dict of inputs (paths, fields and values) for every
+             module, generated in a file geodatabase in folder.
+    Notes: Sites are 10 to 10,000 restoration polygons, addresses 10k to
+           10M points. Other inputs scale with the area the sites cover.
+           overlap is the fraction of sites overlapping another site (see
+           site_rows). Inputs already generated for the same scale and
+           seed are reused, see inputs.json in the geodatabase folder.
+    Example: inputs = generate(r"C:\\temp", sites=1000, addresses=10 ** 6)
+    """
+    name = "RBI_synthetic_{}_{}_{}".format(sites, addresses, seed)
+    if overlap > 0:
+        name += "_overlap{}".format(int(overlap * 100))
+    gdb = os.path.join(folder, name + ".gdb")
+    info = os.path.join(folder, name + ".json")
+    if os.path.exists(info) and arcpy.Exists(gdb):
+        with open(info) as f:
+            return json.load(f)
+    message("Generating {} sites and {} addresses in {}".format(sites,
+                                                               addresses,
+                                                               gdb))
+    arcpy.CreateFileGDB_management(folder, name + ".gdb")
+    rand = numpy.random.RandomState(seed)
+    side = extent_side(sites)
+    towns = numpy.column_stack([
+        ORIGIN[0] + rand.uniform(0, side, max(3, sites // 20)),
+        ORIGIN[1] + rand.uniform(0, side, max(3, sites // 20))])
+
+    inputs = {"sites": new_fc(gdb, "sites", "POLYGON",
+                              [("siteName", "TEXT")])}
+    insert_rows(inputs["sites"], ["SHAPE@", "siteName"],
+                site_rows(rand, sites, side, overlap))
+    pnts = points_array(rand, addresses, towns, side)
+    inputs["addresses"] = points_fc(gdb, "addresses", pnts)
+    inputs["popRast"] = population_raster(gdb, "population", pnts, side)
+    del pnts
+    area = (side / 1000.0) ** 2  # square kilometers
+    inputs["flood_zone"] = blob_polygons(gdb, "flood_zones", rand, side,
+                                         int(area / 4) + 1, 800)
+    inputs["wetlands"] = blob_polygons(gdb, "wetlands", rand, side,
+                                       int(area) + 1, 150)
+    inputs["subs"] = points_fc(gdb, "dams", points_array(
+        rand, int(area / 20) + 1, towns, side))
+    inputs["edu_inst"] = points_fc(gdb, "schools", points_array(
+        rand, int(area / 5) + 1, towns, side))
+    inputs["bus_stp"] = points_fc(gdb, "bus_stops", points_array(
+        rand, int(area) + 1, towns, side))
+    inputs["trails"] = lines(gdb, "trails", rand, side, int(area / 10) + 1)
+    inputs["roads"] = lines(gdb, "roads", rand, side, int(area / 2) + 1, 20)
+    inputs["landuse"] = grid_polygons(gdb, "landuse", rand, side, 500,
+                                      "LULC", LANDUSE)
+    inputs["sovi"] = grid_polygons(gdb, "sovi", rand, side, 1500, "SoVI",
+                                   SOVI)
+    inputs["conserved"] = grid_polygons(gdb, "conservation", rand, side,
+                                        750, "Status", CONSERVATION)
+    inputs["catchment"], inputs["flow"] = nhdplus(gdb, rand, side)
+    inputs.update({"landuse_field": "LULC", "greenspace": GREENSPACE,
+                   "sovi_field": "SoVI", "sovi_high": SOVI_HIGH,
+                   "cons_field": "Status", "conserved_values": CONSERVED,
+                   "threatened_values": [x for x in CONSERVATION
+                                         if x not in CONSERVED],
+                   "catchment_field": "FEATUREID", "gdb": gdb,
+                   "scale": {"sites": sites, "addresses": addresses,
+                             "seed": seed, "overlap": overlap,
+                             "side_m": side}})
+    with open(info, "w") as f:
+        json.dump(inputs, f, indent=1)
+    return inputs
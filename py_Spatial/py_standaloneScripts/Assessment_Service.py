@@ -0,0 +1,329 @@
+"""
+# Name: Rapid Benefit Indicator Assessment - Assessment Service
+# Purpose: Keep statewide inputs loaded in one process and assess new sites
+#          sent to it over localhost HTTP, without loading arcpy, checking
+#          inputs or reading the NHD Plus network again for each request.
+#
+# Version Notes:
+# Developed in ArcGIS 10.3
+#0.1.0 preloaded inputs, /assess and /status, client
+#0.1.1 wetlands dissolved and landuse reduced to greenspace once
+#
+# The service loads the "shared" assess keywords of a job file (see
+# Batch_Assessment.py), and optional settings under "service", e.g.
+#   {"service": {"port": 8765, "spatial_reference": 26919},
+#    "shared": {"addresses": "statewide.gdb/addresses", ...}}
+# POST /assess  {"sites": GeoJSON FeatureCollection (WGS84) or a dataset
+#                path, any other assess keywords, e.g. "modules"}
+#               returns {"results": {field: [values in site order]}}
+# GET /status   returns the loaded inputs and requests answered
+# Requests are answered one at a time, arcpy is not thread safe.
+#
+# Example: python Assessment_Service.py statewide.yaml
+#          python Assessment_Service.py --client new_sites.geojson
+"""
+###########IMPORTS###########
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+from decimal import Decimal
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from urllib2 import urlopen, Request, HTTPError
+except ImportError:  # python 3
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from urllib.request import urlopen, Request
+    from urllib.error import HTTPError
+import arcpy
+
+import Batch_Assessment
+
+arcpy.env.overwriteOutput = True #overwrite existing files
+
+###########DEFAULTS############
+# Only this machine can reach the service
+HOST = "127.0.0.1"
+PORT = 8765
+# GeoJSON sites are in WGS84
+GEOJSON_SR = 4326
+###############################
+###########FUNCTIONS###########
+message = Batch_Assessment.message
+
+
+def to_json(value):
+    """json.dump default for Decimal and date values in results"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def preload(tools, config_path, folder):
+    """Preload Inputs
+    Purpose: Returns the service state, with the shared inputs of the job
+             file at config_path staged in folder, projected to one spatial
+             reference and prepared (see prepare_inputs), and the NHD Plus
+             network read into memory.
+    Notes: Projected copies are kept in the re-projection cache (see
+           projection_cache), so requests never project statewide inputs.
+           The spatial reference is service "spatial_reference" or that of
+           the first input.
+    """
+    config = Batch_Assessment.read_job_file(config_path)
+    service = config.get("service") or {}
+    inputs = Batch_Assessment.absolute_paths(
+        dict(config.get("shared") or {}),
+        os.path.dirname(os.path.abspath(config_path)))
+    inputs.pop("sites", None)
+    keys = [x for x in Batch_Assessment.DATASETS
+            if inputs.get(x) is not None]
+    copies = Batch_Assessment.stage_datasets(
+        tools, [inputs[x] for x in keys], folder)
+    for key in keys:
+        inputs[key] = copies[inputs[key]]
+
+    if service.get("spatial_reference") is not None:
+        SR = arcpy.SpatialReference(service["spatial_reference"])
+    elif len(keys) > 0:
+        SR = tools.describe_cached(inputs[keys[0]])["spatialReference"]
+    else:
+        raise ValueError("{} has no shared inputs".format(config_path))
+    for key in keys:
+        dataset = inputs[key]
+        if (tools.is_vector(dataset) and SR.name !=
+                tools.describe_cached(dataset)["spatialReference"].name):
+            inputs[key] = tools.projection_cache(dataset, SR)
+    full = dict(inputs)  # for requests changing how inputs are prepared
+    prepare_inputs(tools, inputs, folder)
+
+    if "flood" in (inputs.get("modules") or tools.benefits):
+        flow = os.path.join(tools.nhd_gdb, "PlusFlow")
+        if arcpy.Exists(flow):
+            tools.setNHD_dict(flow)  # kept for FR_MODULE, see nhd_cache
+    message("Inputs loaded:\n" + "\n".join(
+        "  {}: {}".format(k, inputs[k]) for k in sorted(inputs)))
+    return {"inputs": inputs, "full": full, "SR": SR, "requests": 0,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def prepare_inputs(tools, inputs, folder):
+    """Prepare Inputs
+    Purpose: Does the input prep assess would otherwise repeat for every
+             request once, updating inputs: existing wetlands are dissolved
+             (wetlands_dissolved, used by Scenic View) and landuse is
+             reduced to the greenspace values the modules select from it.
+    Notes: Wetlands are dissolved into separate polygons, so each request
+           only copies those near its sites (see prep_input). Results are
+           kept in folder and made again only when their input changes (see
+           input_fingerprint).
+    """
+    gdb = os.path.join(folder, "prepared_inputs.gdb")
+    info = os.path.join(folder, "prepared_inputs.json")
+    prepared = {}
+    if arcpy.Exists(gdb) and os.path.exists(info):
+        with open(info) as f:
+            prepared = json.load(f)
+    elif not arcpy.Exists(gdb):
+        arcpy.CreateFileGDB_management(folder, "prepared_inputs.gdb")
+
+    def prepare(name, dataset, settings, make):
+        out = os.path.join(gdb, name)
+        key = [tools.input_fingerprint(dataset), settings]
+        if prepared.get(name) != key or not arcpy.Exists(out):
+            message("Preparing {} from {}".format(name, dataset))
+            tools.del_exists(out)
+            make(out)
+            prepared[name] = key
+            with open(info, "w") as f:
+                json.dump(prepared, f, indent=1)
+        return out
+
+    wetlands = inputs.get("wetlands")
+    if wetlands is not None:
+        inputs["wetlands_dissolved"] = prepare(
+            "wetlands_dissolved", wetlands, None,
+            lambda out: arcpy.Dissolve_management(wetlands, out, "", "",
+                                                  "SINGLE_PART"))
+    landuse, field = inputs.get("landuse"), inputs.get("landuse_field")
+    greenspace = inputs.get("greenspace")
+    if None not in [landuse, field, greenspace]:
+        typ = tools.tbl_fieldType(landuse, field)
+        where = tools.selectStr_by_list(field, tools.ListType_fromField(
+            typ, greenspace))
+        inputs["landuse"] = prepare(
+            "greenspace", landuse, where,
+            lambda out: arcpy.FeatureClassToFeatureClass_conversion(
+                landuse, gdb, os.path.basename(out), where))
+
+
+def geojson_sites(collection, SR):
+    """GeoJSON Sites
+    Purpose: Returns a GeoJSON FeatureCollection of site polygons as an
+             in_memory feature class in SR, with a siteName field from
+             "siteName" or "name" properties when they have one.
+    """
+    features = collection.get("features", [])
+    if len(features) == 0:
+        raise ValueError("No site features in request")
+    wgs = arcpy.CreateUniqueName("request_wgs", "in_memory")
+    arcpy.CreateFeatureclass_management(
+        "in_memory", os.path.basename(wgs), "POLYGON",
+        spatial_reference=arcpy.SpatialReference(GEOJSON_SR))
+    arcpy.AddField_management(wgs, "siteName", "TEXT")
+    with arcpy.da.InsertCursor(wgs, ["SHAPE@", "siteName"]) as cursor:
+        for i, feature in enumerate(features):
+            props = feature.get("properties") or {}
+            name = props.get("siteName", props.get("name", i + 1))
+            cursor.insertRow([arcpy.AsShape(feature["geometry"]),
+                              str(name)])
+    sites = arcpy.CreateUniqueName("request_sites", "in_memory")
+    arcpy.Project_management(wgs, sites, SR)
+    arcpy.Delete_management(wgs)
+    return sites
+
+
+def assess_request(tools, state, request):
+    """Assess Request
+    Purpose: Returns assess results for the sites of a request, using the
+             preloaded inputs for any keywords the request doesn't set.
+    Notes: Requests setting wetlands or landuse keywords are assessed on
+           inputs as loaded, not as prepared for the shared settings (see
+           prepare_inputs).
+    """
+    if "sites" not in request:
+        raise ValueError("Request has no sites")
+    keywords = dict(state["inputs"])
+    if "wetlands" in request:
+        keywords.pop("wetlands_dissolved", None)
+    if len(set(request) & set(["landuse", "landuse_field",
+                               "greenspace"])) > 0:
+        keywords["landuse"] = state["full"].get("landuse")
+    keywords.update(request)
+    sites = keywords.pop("sites")
+    copy = None
+    if isinstance(sites, dict):
+        sites = copy = geojson_sites(sites, state["SR"])
+    for key in ["outTbl", "output", "pdf"]:
+        keywords.pop(key, None)  # results are returned, not kept
+    try:
+        return tools.assess(sites, output="dict", **keywords)
+    finally:
+        if copy is not None:
+            tools.deleteFC_Lst([copy])
+
+
+def make_handler(tools, state):
+    """Returns the HTTP request handler class answering from state"""
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, body):
+            data = json.dumps(body, default=to_json).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/status":
+                return self.reply(404, {"error": "Unknown path " + self.path})
+            self.reply(200, {"inputs": state["inputs"],
+                             "requests": state["requests"],
+                             "started": state["started"],
+                             "spatial_reference": state["SR"].name})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/assess":
+                return self.reply(404, {"error": "Unknown path " + self.path})
+            start = tools.timer()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length).decode("utf-8"))
+                results = assess_request(tools, state, request)
+            except (ValueError, KeyError, TypeError) as e:
+                return self.reply(400, {"error": str(e)})
+            except Exception as e:
+                traceback.print_exc()
+                return self.reply(500, {"error": str(e)})
+            state["requests"] += 1
+            self.reply(200, {"results": results,
+                             "seconds": tools.timer()[0] - start[0]})
+
+        def log_message(self, format, *args):
+            message("{} {}".format(self.address_string(), format % args))
+    return Handler
+
+
+def serve(config_path, port=None, folder=None):
+    """Serve
+    Purpose: Preloads the inputs of the job file at config_path and answers
+             assessment requests on localhost until stopped (Ctrl+C).
+    """
+    tools = Batch_Assessment.load_tools()
+    folder = folder or os.path.join(os.path.dirname(os.path.abspath(
+        config_path)), "service_inputs")
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    state = preload(tools, config_path, folder)
+    service = Batch_Assessment.read_job_file(config_path).get("service") or {}
+    port = int(port or service.get("port") or PORT)
+    server = HTTPServer((HOST, port), make_handler(tools, state))
+    message("Answering assessment requests on http://{}:{}".format(HOST,
+                                                                   port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        message("Stopped after {} requests".format(state["requests"]))
+    finally:
+        server.server_close()
+
+
+def assess_remote(sites, url="http://{}:{}".format(HOST, PORT), **keywords):
+    """Assess Remote
+    Purpose: Client, returns the results of assessing sites with the
+             service at url, where sites is a GeoJSON FeatureCollection (a
+             dict or .geojson/.json file) or a dataset path the service can
+             read. keywords are other assess keywords, e.g. modules.
+    Example: results = assess_remote("new_sites.geojson", modules=["flood"])
+    """
+    if not isinstance(sites, dict) and os.path.splitext(
+            str(sites))[1].lower() in [".geojson", ".json"]:
+        with open(sites) as f:
+            sites = json.load(f)
+    keywords["sites"] = sites
+    request = Request(url.rstrip("/") + "/assess",
+                      json.dumps(keywords).encode("utf-8"),
+                      {"Content-Type": "application/json"})
+    try:
+        response = urlopen(request)
+    except HTTPError as e:
+        raise Exception("Assessment service error: {}".format(
+            json.loads(e.read().decode("utf-8"))["error"]))
+    return json.loads(response.read().decode("utf-8"))["results"]
+
+
+##############################
+###########EXECUTE############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("config", nargs="?",
+                        help="job file with the shared inputs to load")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--folder", help="where inputs are staged")
+    parser.add_argument("--client", metavar="SITES",
+                        help="send sites (GeoJSON) to a running service")
+    parser.add_argument("--url", default="http://{}:{}".format(HOST, PORT))
+    parser.add_argument("--modules", nargs="+", help="benefits to assess")
+    args = parser.parse_args()
+    if args.client is not None:
+        keywords = {}
+        if args.modules is not None:
+            keywords["modules"] = args.modules
+        results = assess_remote(args.client, args.url, **keywords)
+        json.dump(results, sys.stdout, indent=1)
+    elif args.config is None:
+        parser.error("a job file is needed to start the service")
+    else:
+        serve(args.config, args.port, args.folder)
@@ -0,0 +1,372 @@
+"""
+# Name: Rapid Benefit Indicator Assessment - Batch Assessment
+# Purpose: Run many full assessments listed in a job file (JSON, YAML or
+#          TOML), e.g. a whole state's restoration candidates overnight.
+#
+# Version Notes:
+# Developed in ArcGIS 10.3
+#0.1.0 job files, shared inputs staged once, worker processes, run summary
+#
+# Job file: every key other than name is an assess keyword (see assess in
+# RBI_Spatial_Analysis_Tools.pyt), relative paths are from the job file.
+#   {"workers": 4,
+#    "output": "results",
+#    "shared": {"addresses": "inputs.gdb/addresses",
+#               "flood_zone": "inputs.gdb/flood_zones",
+#               "modules": ["flood", "view", "edu"]},
+#    "jobs": [{"name": "kent_county", "sites": "kent.gdb/sites"},
+#             {"name": "washington_county", "sites": "wash.gdb/sites",
+#              "modules": ["flood"]}]}
+#
+# Example: python Batch_Assessment.py jobs.yaml --workers 4
+#          python Batch_Assessment.py jobs.json --output C:\\RBI_overnight
+"""
+###########IMPORTS###########
+import os
+import sys
+import imp
+import csv
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import traceback
+import arcpy
+
+arcpy.env.overwriteOutput = True #overwrite existing files
+
+###########DEFAULTS############
+# Toolbox the assessments are run with
+PYT = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(
+    __file__))), "RBI_Spatial_Analysis_Tools.pyt")
+# assess keywords that are input datasets, staged once when shared
+DATASETS = ["sites", "addresses", "popRast", "flood_zone", "subs",
+            "edu_inst", "bus_stp", "trails", "roads", "wetlands", "landuse",
+            "sovi", "conserved"]
+###############################
+###########FUNCTIONS###########
+def message(string, severity = 0):
+    """Generic message
+    Purpose: prints string message in py or pyt.
+    """
+    print(string)
+    if severity == 1:
+        arcpy.AddWarning(string)
+    else:
+        arcpy.AddMessage(string)
+
+
+def load_tools(pyt=PYT):
+    """Returns the toolbox loaded as a module"""
+    return imp.load_source("RBI_Spatial_Analysis_Tools", pyt)
+
+
+def read_job_file(path):
+    """Read Job File
+    Purpose: Returns the job file as a dict, read by its extension as JSON,
+             YAML (.yaml, .yml, needs PyYAML) or TOML (.toml, needs tomllib
+             or toml).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in [".yaml", ".yml"]:
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is needed to read " + path)
+        with open(path) as f:
+            return yaml.safe_load(f)
+    if ext == ".toml":
+        try:
+            import tomllib as toml_lib
+            with open(path, "rb") as f:
+                return toml_lib.load(f)
+        except ImportError:
+            try:
+                import toml as toml_lib
+            except ImportError:
+                raise ImportError("tomllib or toml is needed to read " + path)
+            with open(path) as f:
+                return toml_lib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def safe_name(name):
+    """returns name with only letters, numbers and _, for geodatabases"""
+    return "".join(x if x.isalnum() else "_" for x in name)
+
+
+def absolute_paths(job, folder):
+    """returns job with its dataset and file paths made absolute from
+    folder"""
+    for key in DATASETS + ["pdf", "trace"]:
+        if job.get(key) is not None:
+            job[key] = os.path.join(folder, job[key])
+    return job
+
+
+def read_jobs(path):
+    """Read Jobs
+    Purpose: Returns (settings, jobs) from a job file, where each job is a
+             dict of assess keywords with the shared ones filled in and
+             dataset paths made absolute.
+    Notes: Errors out if a job has no name or sites, or two jobs share a
+           name (it names their results).
+    """
+    config = read_job_file(path)
+    if not isinstance(config, dict) or "jobs" not in config:
+        raise ValueError("{} has no list of jobs".format(path))
+    folder = os.path.dirname(os.path.abspath(path))
+    shared = config.get("shared") or {}
+    jobs, names = [], []
+    for i, item in enumerate(config["jobs"]):
+        job = dict(shared)
+        job.update(item)
+        if "name" not in job or "sites" not in job:
+            raise ValueError("Job {} needs a name and sites".format(i + 1))
+        if safe_name(job["name"]) in names:
+            raise ValueError("Job name {} is used more than once".format(
+                job["name"]))
+        names.append(safe_name(job["name"]))
+        jobs.append(absolute_paths(job, folder))
+    settings = dict((k, v) for k, v in config.items()
+                    if k not in ["jobs", "shared"])
+    if settings.get("output") is not None:
+        settings["output"] = os.path.join(folder, settings["output"])
+    return settings, jobs
+
+
+def copy_dataset(dataset, out):
+    """Copies dataset to out with the tool for its type"""
+    typ = arcpy.Describe(dataset).dataType
+    if typ in ["RasterDataset", "RasterBand"]:
+        arcpy.CopyRaster_management(dataset, out)
+    elif typ in ["Table", "TableView", "DbaseTable"]:
+        arcpy.CopyRows_management(dataset, out)
+    else:
+        arcpy.CopyFeatures_management(dataset, out)
+
+
+def stage_datasets(tools, datasets, folder):
+    """Stage Datasets
+    Purpose: Copies datasets into a local file geodatabase in folder,
+             returning {dataset: copy}, so network or enterprise inputs are
+             read once.
+    Notes: Copies are kept between runs and only made again when their
+           source changes (see input_fingerprint).
+    """
+    gdb = os.path.join(folder, "shared_inputs.gdb")
+    info = os.path.join(folder, "shared_inputs.json")
+    staged = {}
+    if arcpy.Exists(gdb) and os.path.exists(info):
+        with open(info) as f:
+            staged = json.load(f)
+    elif not arcpy.Exists(gdb):
+        arcpy.CreateFileGDB_management(folder, "shared_inputs.gdb")
+    copies = {}
+    for dataset in datasets:
+        fingerprint = tools.input_fingerprint(dataset)
+        out = os.path.join(gdb, "in_" + hashlib.md5(
+            dataset.encode("utf-8")).hexdigest()[:12])
+        if staged.get(dataset) != fingerprint or not arcpy.Exists(out):
+            message("Staging {}".format(dataset))
+            tools.del_exists(out)
+            copy_dataset(dataset, out)
+            staged[dataset] = fingerprint
+            with open(info, "w") as f:
+                json.dump(staged, f, indent=1)
+        copies[dataset] = out
+    return copies
+
+
+def stage_shared(tools, jobs, folder):
+    """Stage Shared Inputs
+    Purpose: Stages datasets used by more than one job (see stage_datasets),
+             pointing those jobs at the copies.
+    """
+    counts = {}
+    for job in jobs:
+        for key in DATASETS:
+            if job.get(key) is not None:
+                counts[job[key]] = counts.get(job[key], 0) + 1
+    shared = [x for x, n in counts.items() if n > 1]
+    if len(shared) == 0:
+        return
+    copies = stage_datasets(tools, shared, folder)
+    for job in jobs:
+        for key in DATASETS:
+            if job.get(key) in copies:
+                job[key] = copies[job[key]]
+
+
+def job_hash(tools, job):
+    """returns a hash of job's keywords and input datasets (see
+    input_fingerprint), to tell if it changed since it was run"""
+    inputs = [tools.input_fingerprint(job.get(x)) for x in DATASETS]
+    return hashlib.md5(json.dumps([job, inputs], sort_keys=True).encode(
+        "utf-8")).hexdigest()
+
+
+def run_job(tools, job_file):
+    """Run Job
+    Purpose: Runs one assessment from its job_file (written by run_batch),
+             writing its results table and status next to it.
+    """
+    with open(job_file) as f:
+        spec = json.load(f)
+    job = dict(spec["job"])
+    status = {"name": job.pop("name"), "hash": spec["hash"],
+              "outTbl": spec["outTbl"], "status": "failed", "sites": None,
+              "seconds": None, "error": None, "pid": os.getpid()}
+    start = tools.timer()
+    try:
+        gdb = os.path.dirname(spec["outTbl"])
+        if not arcpy.Exists(gdb):
+            arcpy.CreateFileGDB_management(os.path.dirname(gdb),
+                                           os.path.basename(gdb))
+        tools.assess(outTbl=spec["outTbl"], output=None, **job)
+        status["sites"] = int(arcpy.GetCount_management(
+            spec["outTbl"]).getOutput(0))
+        status["status"] = "done"
+    except Exception as e:
+        status["error"] = str(e)
+        traceback.print_exc()
+    status["seconds"] = tools.timer()[0] - start[0]
+    with open(spec["status"], "w") as f:
+        json.dump(status, f, indent=1)
+    return status
+
+
+def run_batch(job_path, workers=None, output=None, rerun=False):
+    """Run Batch
+    Purpose: Runs every job in the job file at job_path, up to workers at a
+             time each in its own process, and returns the run summary.
+    Notes: Each job's results are in output/<name>.gdb/results, with its
+           messages in output/jobs/<name>.log. The summary, one row per job,
+           is written to output/run_summary.csv and .json. Jobs that
+           finished in an earlier batch with the same keywords are skipped
+           unless rerun, so a batch that stopped can be run again.
+    """
+    tools = load_tools()
+    settings, jobs = read_jobs(job_path)
+    workers = int(workers or settings.get("workers") or 1)
+    output = output or settings.get("output") or os.path.join(
+        os.path.dirname(os.path.abspath(job_path)), "batch_results")
+    job_dir = os.path.join(output, "jobs")
+    if not os.path.isdir(job_dir):
+        os.makedirs(job_dir)
+    message("{} jobs in {}, {} at a time".format(len(jobs), job_path,
+                                                  workers))
+    stage_shared(tools, jobs, output)
+
+    # Jobs to run, those finished before are summarized from their status
+    start = tools.timer()
+    queue, summary = [], []
+    for job in jobs:
+        name = safe_name(job["name"])
+        spec = {"job": job, "hash": job_hash(tools, job),
+                "outTbl": os.path.join(output, name + ".gdb", "results"),
+                "status": os.path.join(job_dir, name + ".status.json")}
+        if not rerun and os.path.exists(spec["status"]):
+            with open(spec["status"]) as f:
+                status = json.load(f)
+            if status["status"] == "done" and status["hash"] == spec["hash"]:
+                message("{} done in an earlier batch".format(job["name"]))
+                summary.append(status)
+                continue
+        job_file = os.path.join(job_dir, name + ".json")
+        with open(job_file, "w") as f:
+            json.dump(spec, f, indent=1)
+        queue.append((job_file, spec))
+
+    if workers == 1:
+        for job_file, spec in queue:
+            message("Running " + spec["job"]["name"])
+            summary.append(run_job(tools, job_file))
+    else:
+        script = os.path.realpath(__file__)
+        flags = 0x08000000 if os.name == "nt" else 0  # CREATE_NO_WINDOW
+        running = []
+        try:
+            while len(queue) > 0 or len(running) > 0:
+                # Start jobs while there are free workers
+                while len(queue) > 0 and len(running) < workers:
+                    job_file, spec = queue.pop(0)
+                    log = open(os.path.splitext(job_file)[0] + ".log", "w")
+                    proc = subprocess.Popen(
+                        [tools.python_exe(), script, "--job", job_file],
+                        stdout=log, stderr=subprocess.STDOUT,
+                        creationflags=flags)
+                    running.append((proc, job_file, spec, log))
+                    message("{} started in process {}".format(
+                        spec["job"]["name"], proc.pid))
+                time.sleep(0.5)
+                # Collect finished jobs
+                for item in list(running):
+                    proc, job_file, spec, log = item
+                    if proc.poll() is None:
+                        continue
+                    running.remove(item)
+                    log.close()
+                    if os.path.exists(spec["status"]):
+                        with open(spec["status"]) as f:
+                            status = json.load(f)
+                    else:  # the process ended before writing its status
+                        status = {"name": spec["job"]["name"],
+                                  "hash": spec["hash"], "status": "failed",
+                                  "outTbl": spec["outTbl"], "sites": None,
+                                  "seconds": None, "pid": proc.pid,
+                                  "error": "exit code {}".format(
+                                      proc.returncode)}
+                    message("{} {}".format(status["name"], status["status"]),
+                            0 if status["status"] == "done" else 1)
+                    summary.append(status)
+        finally:
+            for proc, job_file, spec, log in running:
+                proc.kill()
+                log.close()
+
+    write_summary(summary, output)
+    message("{} of {} jobs done in {:.1f} s".format(
+        len([x for x in summary if x["status"] == "done"]), len(summary),
+        tools.timer()[0] - start[0]))
+    return summary
+
+
+def write_summary(summary, output):
+    """Writes the run summary to output/run_summary.json and .csv"""
+    fields = ["name", "status", "sites", "seconds", "outTbl", "error"]
+    with open(os.path.join(output, "run_summary.json"), "w") as f:
+        json.dump(summary, f, indent=1)
+    mode = "wb" if sys.version_info[0] < 3 else "w"  # csv line endings
+    with open(os.path.join(output, "run_summary.csv"), mode) as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for status in summary:
+            writer.writerow([status.get(x) for x in fields])
+    for status in summary:
+        if status["status"] != "done":
+            message("{}: {}".format(status["name"], status["error"]), 1)
+
+
+##############################
+###########EXECUTE############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("jobs", nargs="?", help="JSON, YAML or TOML job file")
+    parser.add_argument("--workers", type=int,
+                        help="jobs run at a time (default from job file, 1)")
+    parser.add_argument("--output", help="folder for results and summary")
+    parser.add_argument("--rerun", action="store_true",
+                        help="run jobs finished in an earlier batch again")
+    parser.add_argument("--job", help=argparse.SUPPRESS)  # worker process
+    args = parser.parse_args()
+    if args.job is not None:
+        status = run_job(load_tools(), args.job)
+        sys.exit(0 if status["status"] == "done" else 1)
+    if args.jobs is None:
+        parser.error("a job file is needed")
+    summary = run_batch(args.jobs, args.workers, args.output, args.rerun)
+    if any(x["status"] != "done" for x in summary):
+        sys.exit(1)
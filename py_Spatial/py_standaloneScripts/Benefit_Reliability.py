@@ -10,6 +10,7 @@
 """
 ###########IMPORTS###########
 import os
+import imp
 import time
 import arcpy
 from decimal import Decimal
@@ -24,6 +25,7 @@ cons_fieldLst = ""#list of values from field to consider conservation e.g. ["Con
 threat_fieldLst = ""#DETERMINE FROM cons_fieldLst?
 rel_buff_dist = ""#Buffer Distance e.g. "1 Miles"
 outTbl = ""#output file
+profile_gp = False  # time arcpy tool calls ("rows" counts features too)
 ###############################
 ###########FUNCTIONS###########
 def message(string, severity = 0):
@@ -279,6 +281,13 @@ def reliability_MODULE(PARAMS):
 
 ##############################
 ###########EXECUTE############
+# Profile with the toolbox's profiler (see profile_arcpy in the .pyt)
+tools = None
+if profile_gp:
+    tools = imp.load_source("RBI_Spatial_Analysis_Tools", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+        "RBI_Spatial_Analysis_Tools.pyt"))
+    tools.profile_arcpy(True, profile_gp == "rows")
 try:
     start = time.clock()
     reliability_MODULE([conserved, rel_field, cons_fieldLst,
@@ -287,3 +296,7 @@ try:
 except Exception:
     message("Error occured during Reliability assessment.", 1)
     traceback.print_exc()
+finally:
+    if tools is not None:
+        tools.gp_summary()
+        tools.profile_arcpy(False)
@@ -10,6 +10,7 @@
 """
 ###########IMPORTS###########
 import os
+import imp
 import arcpy
 import subprocess
 from urllib import urlretrieve
@@ -28,6 +29,8 @@ NHD_VUB = arcpy.GetParameterAsText(1)
 local = arcpy.GetParameterAsText(2)
 # Defaults
 #NHD_VUB, local = None, None
+# Time arcpy tool calls ("rows" counts features too)
+profile_gp = False
 
 ###########FUNCTIONS###########
 def message(string, severity = 0):
@@ -230,6 +233,13 @@ if local is None:
 else:
     message("Files will be Downloaded to user location:\n" + local)
 
+# Profile with the toolbox's profiler (see profile_arcpy in the .pyt)
+tools = None
+if profile_gp:
+    tools = imp.load_source("RBI_Spatial_Analysis_Tools",
+                            script_dir + "RBI_Spatial_Analysis_Tools.pyt")
+    tools.profile_arcpy(True, profile_gp == "rows")
+
 # Default file location to copy downloads to
 local_gdb = local + os.sep + "NHDPlus_Downloads.gdb"
 if os.path.isdir(local_gdb) and get_ext(local_gdb) == ".gdb":
@@ -353,7 +363,10 @@ for i, DA in enumerate(d_list):
     local_flow = local_gdb + os.sep + "PlusFlow"
     append_to_default(local_flow, flow_dbf, "flow table")
 
-        
+if tools is not None:
+    tools.gp_summary()
+    tools.profile_arcpy(False)
+
 #########NOTES########
 #import ftplib
 #
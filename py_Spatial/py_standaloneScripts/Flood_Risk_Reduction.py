@@ -10,6 +10,7 @@
 """
 ###########IMPORTS###########
 import os
+import imp
 import sys
 import time
 import arcpy
@@ -30,6 +31,7 @@ Catchment = ""
 InputField = ""
 relTbl = ""
 outTbl = ""
+profile_gp = False  # time arcpy tool calls ("rows" counts features too)
 ###############################
 #inputs gdb
 #in_gdb = r"~\Code\Python\Python_Addins\Tier1_pyt\Test_Inputs.gdb"
@@ -731,6 +733,13 @@ def FR_MODULE(PARAMS):
 
 #########################
 #########EXECUTE#########
+# Profile with the toolbox's profiler (see profile_arcpy in the .pyt)
+tools = None
+if profile_gp:
+    tools = imp.load_source("RBI_Spatial_Analysis_Tools", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+        "RBI_Spatial_Analysis_Tools.pyt"))
+    tools.profile_arcpy(True, profile_gp == "rows")
 try:
     start = time.clock()
     FR_MODULE([addresses, popRast, flood_zone, OriWetlands, subs, Catchment, InputField, relTbl, outTbl])
@@ -738,3 +747,7 @@ try:
 except Exception:
     message("Error occured during assessment.", 1)
     traceback.print_exc()
+finally:
+    if tools is not None:
+        tools.gp_summary()
+        tools.profile_arcpy(False)
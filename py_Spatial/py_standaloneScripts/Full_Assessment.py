@@ -10,6 +10,7 @@
 """
 ###########IMPORTS###########
 import os
+import imp
 import sys
 import time
 import arcpy
@@ -80,6 +81,7 @@ useVal = ['Conservation/Limited', 'Major Parks & Open Space', 'Narragansett Indi
 outTbl = ""
 
 pdf = r""
+profile_gp = False  # time arcpy tool calls ("rows" counts features too)
 
 params = [sites, addresses, popRast, flood, view, edu, rec, bird, socEq, rel,
           flood_zone, dams, edu_inst, bus_stp, trails, roads, preWetlands, landUse, LULC_field, landVal,
@@ -835,6 +837,18 @@ def quant_to_qual_lst(lst):
     return qual_lst
 
 ###########MODULES############
+def param_value(param, attr="valueAsText"):
+    """Parameter Value
+    Purpose: returns attr of a tool parameter, or the plain value used in
+             its place in USER INPUTS, where blank ("") is None.
+    """
+    if hasattr(param, attr):
+        return getattr(param, attr)
+    if type(param) in [str, unicode] and param == "":
+        return None
+    return param
+
+
 def main(params):
     """Main"""
     start = time.clock()  # start the clock
@@ -848,25 +862,25 @@ def main(params):
     #          socVal, conserve, conserve_Field, useVal, outTbl, pdf]
     ck = []
     for i in range(3, 10):
-        ck.append(params[i].value)
+        ck.append(param_value(params[i], "value"))
     flood, view, edu, rec, bird = ck[0], ck[1], ck[2], ck[3], ck[4]
     socEq, rel = ck[5], ck[6]
 
-    sites = params[0].valueAsText
-    addresses = params[1].valueAsText
-    popRast = params[2].valueAsText
-
-    flood_zone = params[10].valueAsText
-    subs = params[11].valueAsText
-    edu_inst = params[12].valueAsText
-    bus_Stp = params[13].valueAsText
-    trails = params[14].valueAsText
-    roads = params[15].valueAsText
-    OriWetlands = params[16].valueAsText
-
-    landuse = params[17].valueAsText
-    field = params[18].valueAsText
-    fieldLst = params[19].values
+    sites = param_value(params[0])
+    addresses = param_value(params[1])
+    popRast = param_value(params[2])
+
+    flood_zone = param_value(params[10])
+    subs = param_value(params[11])
+    edu_inst = param_value(params[12])
+    bus_Stp = param_value(params[13])
+    trails = param_value(params[14])
+    roads = param_value(params[15])
+    OriWetlands = param_value(params[16])
+
+    landuse = param_value(params[17])
+    field = param_value(params[18])
+    fieldLst = param_value(params[19], "values")
     if fieldLst is not None:
         # Coerce/map unicode list using field in table
         typ = tbl_fieldType(landuse, field)
@@ -874,9 +888,9 @@ def main(params):
     else:  # no greenspace list
         message("No greenspace field values specified")
 
-    sovi = params[20].valueAsText
-    sovi_field = params[21].valueAsText
-    sovi_High = params[22].values
+    sovi = param_value(params[20])
+    sovi_field = param_value(params[21])
+    sovi_High = param_value(params[22], "values")
     if sovi_High is not None:
         # Coerce/map unicode list using field in table
         typ = tbl_fieldType(sovi, sovi_field)
@@ -885,9 +899,9 @@ def main(params):
         message("Social Equity of benefits will not be assessed")
         socEq = None
 
-    conserved = params[23].valueAsText
-    rel_field = params[24].valueAsText
-    cons_fLst = params[25].values
+    conserved = param_value(params[23])
+    rel_field = param_value(params[24])
+    cons_fLst = param_value(params[25], "values")
     if cons_fLst is not None:
         # Convert unicode lists to field.type
         typ = tbl_fieldType(conserved, rel_field)
@@ -899,8 +913,8 @@ def main(params):
         message("Reliability of benefits will not be assessed")
         rel = None
 
-    outTbl = params[26].valueAsText
-    pdf = params[27].valueAsText
+    outTbl = param_value(params[26])
+    pdf = param_value(params[27])
 
     # DEFAULTS
     # set buffers based on inputs
@@ -1966,6 +1980,13 @@ def Report_MODULE(PARAMS):
 params = [sites, addresses, popRast, flood, view, edu, rec, bird, socEq, rel,
           flood_zone, dams, edu_inst, bus_stp, trails, roads, preWetlands, landUse, LULC_field, landVal,
           socVul, soc_Field, socVal, conserve, conserve_Field, useVal, outTbl, pdf]
+# Profile with the toolbox's profiler (see profile_arcpy in the .pyt)
+tools = None
+if profile_gp:
+    tools = imp.load_source("RBI_Spatial_Analysis_Tools", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+        "RBI_Spatial_Analysis_Tools.pyt"))
+    tools.profile_arcpy(True, profile_gp == "rows")
 try:
     start = time.clock()
     main(params)
@@ -1973,4 +1994,8 @@ try:
 except Exception:
     message("Error occured during assessment.", 1)
     traceback.print_exc()
+finally:
+    if tools is not None:
+        tools.gp_summary()
+        tools.profile_arcpy(False)
 
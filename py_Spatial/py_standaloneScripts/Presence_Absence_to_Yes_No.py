@@ -10,6 +10,7 @@
 """
 ###########IMPORTS###########
 import os
+import imp
 import time
 import arcpy
 
@@ -25,6 +26,7 @@ field = ""
 FC = ""
 #distance within which feature matters
 buff_dist = ""
+profile_gp = False  # time arcpy tool calls ("rows" counts features too)
 
 ##########FUNCTIONS##########
 ###########FUNCTIONS###########
@@ -270,6 +272,13 @@ def absTest_MODULE(PARAMS):
     arcpy.Delete_management(buf)
     
 ###########EXECUTE###########
+# Profile with the toolbox's profiler (see profile_arcpy in the .pyt)
+tools = None
+if profile_gp:
+    tools = imp.load_source("RBI_Spatial_Analysis_Tools", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+        "RBI_Spatial_Analysis_Tools.pyt"))
+    tools.profile_arcpy(True, profile_gp == "rows")
 try:
     start = time.clock() #start the clock
     absTest_MODULE([outTbl, field, FC, buff_dist])
@@ -277,3 +286,7 @@ try:
 except Exception:
     message("Error occured during assessment.", 1)
     traceback.print_exc()
+finally:
+    if tools is not None:
+        tools.gp_summary()
+        tools.profile_arcpy(False)
@@ -10,6 +10,7 @@
 """
 ###########IMPORTS###########
 import os
+import imp
 import time
 import arcpy
 
@@ -21,6 +22,7 @@ outTbl = '' #table to convert
 siteName = '' #optional field in outTbl
 mxd = '' #report layout .mxd
 pdf = '' #report name
+profile_gp = False  # time arcpy tool calls ("rows" counts features too)
 ###############################
 ###########FUNCTIONS###########
 def message(string, severity = 0):
@@ -402,6 +404,13 @@ def Report_MODULE(PARAMS):
 
 ##############################
 ###########EXECUTE############
+# Profile with the toolbox's profiler (see profile_arcpy in the .pyt)
+tools = None
+if profile_gp:
+    tools = imp.load_source("RBI_Spatial_Analysis_Tools", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+        "RBI_Spatial_Analysis_Tools.pyt"))
+    tools.profile_arcpy(True, profile_gp == "rows")
 try:
     start = time.clock()
     Report_MODULE([outTbl, siteName, mxd, pdf])
@@ -409,3 +418,7 @@ try:
 except Exception:
     message("Error occured during assessment.", 1)
     traceback.print_exc()
+finally:
+    if tools is not None:
+        tools.gp_summary()
+        tools.profile_arcpy(False)
@@ -9,6 +9,7 @@
 """
 ###########IMPORTS###########
 import os
+import imp
 import time
 import arcpy
 from decimal import Decimal
@@ -23,6 +24,7 @@ sovi_field = ""#field in feature dataset e.g. "vulnerability"
 sovi_High = ""#list of values from field to consider highly vulnerable
 buff_dist = ""#Buffer Distance e.g. "1 Miles"
 outTbl = ""#output file
+profile_gp = False  # time arcpy tool calls ("rows" counts features too)
 ###############################
 ###########FUNCTIONS###########
 def message(string, severity = 0):
@@ -307,6 +309,13 @@ def socEq_MODULE(PARAMS):
 
 ##############################
 ###########EXECUTE############
+# Profile with the toolbox's profiler (see profile_arcpy in the .pyt)
+tools = None
+if profile_gp:
+    tools = imp.load_source("RBI_Spatial_Analysis_Tools", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+        "RBI_Spatial_Analysis_Tools.pyt"))
+    tools.profile_arcpy(True, profile_gp == "rows")
 try:
     start = time.clock()
     soc_PARAMS = [sovi, sovi_field, sovi_High, buff_dist, outTbl]
@@ -315,3 +324,7 @@ try:
 except Exception:
     message("Error occured during assessment.", 1)
     traceback.print_exc()
+finally:
+    if tools is not None:
+        tools.gp_summary()
+        tools.profile_arcpy(False)